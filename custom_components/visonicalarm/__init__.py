@@ -3,16 +3,19 @@
 from datetime import datetime, timedelta
 import logging
 import threading
+from time import monotonic
+from typing import NamedTuple
 
 import voluptuous as vol
 
 from homeassistant.const import CONF_HOST, CONF_NAME
 from homeassistant.helpers import discovery
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.dispatcher import dispatcher_send
 from homeassistant.helpers.entity import Entity
-from homeassistant.util import Throttle
+from homeassistant.helpers.event import track_time_interval
 
-REQUIREMENTS = ['visonicalarm2==3.3.0', 'python-dateutil==2.7.3']
+REQUIREMENTS = ['visonicalarm2==3.3.0']
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,9 +40,25 @@ DEFAULT_PARTITION = 'ALL'
 
 DOMAIN = 'visonicalarm'
 
+SIGNAL_VISONIC_UPDATE = 'visonicalarm_update'
+
+SCAN_INTERVAL = timedelta(seconds=10)
+
+# Updates requested within this many seconds share the previous fetch.
+UPDATE_TTL = 5
+
 HUB = None
 KEYFOB_DICT = {}
 
+
+class KeyfobInfo(NamedTuple):
+    """Details about a keyfob and its most recent event."""
+
+    name: str
+    id: str
+    last_time_used: str | None
+    last_operation: str | None
+
 CONFIG_SCHEMA = vol.Schema({
     DOMAIN: vol.Schema({
         vol.Required(CONF_HOST): cv.string,
@@ -71,6 +90,17 @@ def setup(hass, config):
     for component in ('sensor', 'alarm_control_panel'):
         discovery.load_platform(hass, component, DOMAIN, {}, config)
 
+    def refresh(now):
+        """Fetch the latest alarm status and push it to the entities."""
+        try:
+            HUB.update()
+        except Exception as ex:
+            _LOGGER.error("Scheduled update failed: %s", ex)
+            return
+        dispatcher_send(hass, SIGNAL_VISONIC_UPDATE)
+
+    track_time_interval(hass, refresh, SCAN_INTERVAL)
+
     return True
 
 
@@ -83,8 +113,12 @@ class VisonicAlarmHub(Entity):
         self.config = domain_config
         self._visonicalarm = visonicalarm
         self._last_update = None
+        self._status_fetch = 0.0
+        self._devices_fetch = 0.0
+        self._device_by_id = {}
 
-        self._lock = threading.Lock()
+        self._status_lock = threading.Lock()
+        self._devices_lock = threading.Lock()
 
         self.alarm = visonicalarm.System(domain_config[CONF_HOST],
                                          domain_config[CONF_APP_ID],
@@ -100,8 +134,7 @@ class VisonicAlarmHub(Entity):
             self.alarm.connect()
             return True
         except Exception as ex:
-            _msg = f"Connection failed: {ex}"
-            _LOGGER.error(_msg)
+            _LOGGER.error("Connection failed: %s", ex)
             return False
 
     @property
@@ -109,24 +142,59 @@ class VisonicAlarmHub(Entity):
         """Return the last update timestamp."""
         return self._last_update
 
-    @Throttle(timedelta(seconds=10))
-    def update(self):
-        """Update all alarm statuses."""
-        try:
-            if self.alarm.is_token_valid is False:
-                self.alarm.connect()
+    def get_device(self, device_id):
+        """Return the device with the given id from the last update."""
+        return self._device_by_id.get(device_id)
 
-            self.alarm.update_status()
-            #self.alarm.update_alarms()
-            #self.alarm.update_troubles()
-            #self.alarm.update_alerts()
-            self.alarm.update_devices()
+    def _refresh_token(self):
+        """Reconnect if the session token has expired."""
+        if self.alarm.is_token_valid is False:
+            self.alarm.connect()
 
-            self._last_update = datetime.now()
-        except Exception as ex:
-            _msg = f"Update failed: {ex}"
-            _LOGGER.error(_msg)
-            raise
+    def update_status(self):
+        """Update the arm status of the alarm system."""
+        with self._status_lock:
+            # Callers queued up behind an in-flight update share its
+            # result instead of stampeding the API.
+            if monotonic() - self._status_fetch < UPDATE_TTL:
+                return
+
+            try:
+                self._refresh_token()
+                self.alarm.update_status()
+                #self.alarm.update_alarms()
+                #self.alarm.update_troubles()
+                #self.alarm.update_alerts()
+
+                self._status_fetch = monotonic()
+                self._last_update = datetime.now()
+            except Exception as ex:
+                _LOGGER.error("Status update failed: %s", ex)
+                raise
+
+    def update_devices(self):
+        """Update the device states of the alarm system."""
+        with self._devices_lock:
+            if monotonic() - self._devices_fetch < UPDATE_TTL:
+                return
+
+            try:
+                self._refresh_token()
+                self.alarm.update_devices()
+                self._device_by_id = {
+                    device.id: device for device in self.alarm.devices
+                }
+
+                self._devices_fetch = monotonic()
+                self._last_update = datetime.now()
+            except Exception as ex:
+                _LOGGER.error("Device update failed: %s", ex)
+                raise
+
+    def update(self):
+        """Update all alarm statuses."""
+        self.update_status()
+        self.update_devices()
 
     @property
     def name(self):
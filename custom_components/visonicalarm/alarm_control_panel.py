@@ -1,8 +1,8 @@
 """Interfaces with the Visonic Alarm control panel."""
 
-from datetime import timedelta
+import asyncio
+from functools import partial
 import logging
-from time import sleep
 
 import homeassistant.components.alarm_control_panel as alarm
 from homeassistant.components.alarm_control_panel import (
@@ -10,7 +10,11 @@ from homeassistant.components.alarm_control_panel import (
     AlarmControlPanelState,
 )
 import homeassistant.components.persistent_notification as pn
-from homeassistant.const import ATTR_CODE_FORMAT, EVENT_STATE_CHANGED, STATE_UNKNOWN
+from homeassistant.const import STATE_UNKNOWN
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.restore_state import RestoreEntity
 
 from . import (
     CONF_EVENT_HOUR_OFFSET,
@@ -18,6 +22,7 @@ from . import (
     CONF_USER_CODE,
     HUB as hub,
     KEYFOB_DICT as keyfobs,
+    SIGNAL_VISONIC_UPDATE,
 )
 
 SUPPORT_VISONIC = (
@@ -36,49 +41,59 @@ ATTR_CHANGED_BY = "changed_by"
 ATTR_CHANGED_TIMESTAMP = "changed_timestamp"
 ATTR_ALARMS = "alarm"
 
-SCAN_INTERVAL = timedelta(seconds=10)
+ALARM_ENTITY_ID = "alarm_control_panel.visonic_alarm"
 
+# How long to wait for the panel to push its new arm state before
+# falling back to a poll.
+STATE_CHANGE_TIMEOUT = 5
 
-def setup_platform(hass, config, add_devices, discovery_info=None):
+# Arm states that warrant refreshing the last event from the API.
+ARM_CHANGE_STATES = frozenset(
+    {
+        AlarmControlPanelState.ARMED_HOME,
+        AlarmControlPanelState.ARMED_AWAY,
+        AlarmControlPanelState.DISARMED,
+    }
+)
+
+ICONS = {
+    AlarmControlPanelState.ARMED_AWAY: "mdi:shield-lock",
+    AlarmControlPanelState.ARMED_HOME: "mdi:shield-home",
+    AlarmControlPanelState.DISARMED: "mdi:shield-check",
+    AlarmControlPanelState.ARMING: "mdi:shield-outline",
+}
+
+
+async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the Visonic Alarm platform."""
-    hub.update()
+    await hass.async_add_executor_job(hub.update_status)
     visonic_alarm = VisonicAlarm(hass)
-    add_devices([visonic_alarm])
+    async_add_entities([visonic_alarm])
 
-    # Create an event listener to listen for changed arm state.
+    # Create a state listener to listen for changed arm state.
     # We will only fetch the events from the API once the arm state has changed
     # because it is quite a lot of data.
+    @callback
     def arm_event_listener(event):
-        entity_id = event.data.get("entity_id")
         old_state = event.data.get("old_state")
         new_state = event.data.get("new_state")
 
         if new_state is None or new_state.state in (STATE_UNKNOWN, ""):
             return
 
-        if entity_id == "alarm_control_panel.visonic_alarm" and (
-            old_state is None or old_state.state != new_state.state
-        ):
+        if old_state is None or old_state.state != new_state.state:
             visonic_alarm.update_state(new_state.state)
-            if new_state.state in (
-                AlarmControlPanelState.ARMED_HOME,
-                AlarmControlPanelState.ARMED_AWAY,
-                AlarmControlPanelState.DISARMED,
-            ):
-                last_event = hub.alarm.get_last_event(
-                    timestamp_hour_offset=visonic_alarm.event_hour_offset
-                )
-                visonic_alarm.update_last_event(
-                    last_event["user"], last_event["timestamp"]
-                )
+            if new_state.state in ARM_CHANGE_STATES:
+                hass.async_create_task(visonic_alarm.async_refresh_last_event())
 
-    hass.bus.listen(EVENT_STATE_CHANGED, arm_event_listener)
+    async_track_state_change_event(hass, [ALARM_ENTITY_ID], arm_event_listener)
 
 
-class VisonicAlarm(alarm.AlarmControlPanelEntity):
+class VisonicAlarm(alarm.AlarmControlPanelEntity, RestoreEntity):
     """Representation of a Visonic Alarm control panel."""
 
     _attr_code_arm_required = False
+    _attr_should_poll = False
 
     def __init__(self, hass):
         """Initialize the Visonic Alarm panel."""
@@ -90,6 +105,31 @@ class VisonicAlarm(alarm.AlarmControlPanelEntity):
         self._changed_timestamp = None
         self._event_hour_offset = hub.config.get(CONF_EVENT_HOUR_OFFSET)
         self._id = hub.alarm.serial_number
+        self._state_changed = asyncio.Event()
+        self._last_seen_update = None
+        self._attr_extra_state_attributes = {}
+
+    async def async_added_to_hass(self):
+        """Restore the last known state and register for hub updates."""
+        await super().async_added_to_hass()
+
+        last_state = await self.async_get_last_state()
+        if last_state is not None and last_state.state not in (STATE_UNKNOWN, ""):
+            try:
+                self._state = AlarmControlPanelState(last_state.state)
+            except ValueError:
+                pass
+
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_VISONIC_UPDATE, self._update_callback
+            )
+        )
+
+    @callback
+    def _update_callback(self):
+        """Refresh the entity state from the hub data."""
+        self.async_schedule_update_ha_state(True)
 
     @property
     def name(self):
@@ -101,34 +141,25 @@ class VisonicAlarm(alarm.AlarmControlPanelEntity):
         """Return a unique id for the alarm system."""
         return self._id
 
-    @property
-    def state_attributes(self):
-        """Return the state attributes of the alarm system."""
-        return {
+    def _refresh_attributes(self):
+        """Rebuild the cached attribute dict if anything changed."""
+        attributes = {
             ATTR_SYSTEM_SERIAL_NUMBER: hub.alarm.serial_number,
             ATTR_SYSTEM_MODEL: hub.alarm.model,
             ATTR_SYSTEM_READY: hub.alarm.ready,
             ATTR_SYSTEM_CONNECTED: hub.alarm.connected,
             ATTR_SYSTEM_SESSION_TOKEN: hub.alarm.session_token,
             ATTR_SYSTEM_LAST_UPDATE: hub.last_update,
-            ATTR_CODE_FORMAT: self.code_format,
-            ATTR_CHANGED_BY: self.changed_by,
             ATTR_CHANGED_TIMESTAMP: self._changed_timestamp,
             ATTR_ALARMS: hub.alarm.alarm,
         }
+        if attributes != self._attr_extra_state_attributes:
+            self._attr_extra_state_attributes = attributes
 
     @property
     def icon(self):
         """Return icon."""
-        if self._state == AlarmControlPanelState.ARMED_AWAY:
-            return "mdi:shield-lock"
-        if self._state == AlarmControlPanelState.ARMED_HOME:
-            return "mdi:shield-home"
-        if self._state == AlarmControlPanelState.DISARMED:
-            return "mdi:shield-check"
-        if self._state == AlarmControlPanelState.ARMING:
-            return "mdi:shield-outline"
-        return "hass:bell-ring"
+        return ICONS.get(self._state, "hass:bell-ring")
 
     @property
     def alarm_state(self):
@@ -160,6 +191,35 @@ class VisonicAlarm(alarm.AlarmControlPanelEntity):
     def update_state(self, state):
         """Update with the state after the state change."""
         self._state = state
+        self._state_changed.set()
+
+    async def _async_wait_for_state_change(self):
+        """Refresh the arm state after a command and wait for the push.
+
+        Kicks an immediate status poll so the new state is visible right
+        away, then waits for the panel to push its final state, polling
+        once more if nothing arrives in time.
+        """
+        await self._hass.async_add_executor_job(hub.update_status)
+        await self.async_update_ha_state(True)
+        try:
+            await asyncio.wait_for(
+                self._state_changed.wait(), STATE_CHANGE_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            await self._hass.async_add_executor_job(hub.update_status)
+            await self.async_update_ha_state(True)
+
+    async def async_refresh_last_event(self):
+        """Fetch the last event from the API and update the attributes."""
+        last_event = await self._hass.async_add_executor_job(
+            partial(
+                hub.alarm.get_last_event,
+                timestamp_hour_offset=self._event_hour_offset,
+            )
+        )
+        self.update_last_event(last_event["user"], last_event["timestamp"])
+        self.async_write_ha_state()
 
     def update_last_event(self, user, timestamp):
         """Update with the user and timestamp of the last state change."""
@@ -167,14 +227,18 @@ class VisonicAlarm(alarm.AlarmControlPanelEntity):
         if keyfobs is None or user.lower() not in keyfobs:
             user_name = user
         else:
-            user_name = keyfobs[user.lower()][0]
+            user_name = keyfobs[user.lower()].name
 
         self._changed_by = user_name
         self._changed_timestamp = timestamp
+        self._refresh_attributes()
+
+    async def async_update(self):
+        """Update alarm status from the hub data."""
+        if hub.last_update == self._last_seen_update:
+            return
+        self._last_seen_update = hub.last_update
 
-    def update(self):
-        """Update alarm status."""
-        hub.update()
         status = hub.alarm.state
         if status == "AWAY":
             self._state = AlarmControlPanelState.ARMED_AWAY
@@ -191,12 +255,14 @@ class VisonicAlarm(alarm.AlarmControlPanelEntity):
         else:
             self._state = status
 
+        self._refresh_attributes()
+
     @property
     def supported_features(self) -> int:
         """Return the list of supported features."""
         return SUPPORT_VISONIC
 
-    def alarm_disarm(self, code=None):
+    async def async_alarm_disarm(self, code=None):
         """Send disarm command."""
         if self._no_pin_required is False:
             if code != self._code:
@@ -207,11 +273,11 @@ class VisonicAlarm(alarm.AlarmControlPanelEntity):
                 )
                 return
 
-        hub.alarm.disarm()
-        sleep(1)
-        self.update()
+        self._state_changed.clear()
+        await self._hass.async_add_executor_job(hub.alarm.disarm)
+        await self._async_wait_for_state_change()
 
-    def alarm_arm_home(self, code=None):
+    async def async_alarm_arm_home(self, code=None):
         """Send arm home command."""
         if self._no_pin_required is False:
             if code != self._code:
@@ -221,10 +287,9 @@ class VisonicAlarm(alarm.AlarmControlPanelEntity):
                 return
 
         if hub.alarm.ready:
-            hub.alarm.arm_home()
-
-            sleep(1)
-            self.update()
+            self._state_changed.clear()
+            await self._hass.async_add_executor_job(hub.alarm.arm_home)
+            await self._async_wait_for_state_change()
         else:
             pn.create(
                 self._hass,
@@ -233,7 +298,7 @@ class VisonicAlarm(alarm.AlarmControlPanelEntity):
                 title="Arm Failed",
             )
 
-    def alarm_arm_away(self, code=None):
+    async def async_alarm_arm_away(self, code=None):
         """Send arm away command."""
         if self._no_pin_required is False:
             if code != self._code:
@@ -243,10 +308,9 @@ class VisonicAlarm(alarm.AlarmControlPanelEntity):
                 return
 
         if hub.alarm.ready:
-            hub.alarm.arm_away()
-
-            sleep(1)
-            self.update()
+            self._state_changed.clear()
+            await self._hass.async_add_executor_job(hub.alarm.arm_away)
+            await self._async_wait_for_state_change()
         else:
             pn.create(
                 self._hass,
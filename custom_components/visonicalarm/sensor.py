@@ -1,10 +1,8 @@
 """Interfaces with the Visonic Alarm sensors."""
 
-from datetime import timedelta
+from enum import IntEnum
 import logging
 
-from dateutil import parser
-
 from homeassistant.const import (
     STATE_CLOSED,
     STATE_OFF,
@@ -12,9 +10,16 @@ from homeassistant.const import (
     STATE_OPEN,
     STATE_UNKNOWN,
 )
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import Entity
 
-from . import CONF_EVENT_HOUR_OFFSET, HUB as hub, KEYFOB_DICT as keyfobs
+from . import (
+    HUB as hub,
+    KEYFOB_DICT as keyfobs,
+    SIGNAL_VISONIC_UPDATE,
+    KeyfobInfo,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,57 +41,142 @@ CONTACT_ATTR_SUBTYPE = "subtype"
 
 KEYFOB_ATTR_KEYFOB_NUMBER = "keyfob_number"
 
-SCAN_INTERVAL = timedelta(seconds=10)
+# Devices that already have an entity, so a repeated platform setup
+# cannot register them twice.
+_ADDED_DEVICE_IDS = set()
+
+ICONS = {
+    STATE_CLOSED: "mdi:door-closed",
+    STATE_OPEN: "mdi:door-open",
+    STATE_OFF: "mdi:motion-sensor-off",
+    STATE_ON: "mdi:motion-sensor",
+}
+
+ICONS_24H = {
+    STATE_CLOSED: "mdi:hours-24",
+}
+
+ALARM_DISARMED_STATES = frozenset({"DISARM", "ARMING"})
+ALARM_ARMED_STATES = frozenset({"AWAY", "DISARMING"})
+
+
+class DeviceKind(IntEnum):
+    """Supported Visonic device categories."""
+
+    MOTION = 1
+    CONTACT = 2
+    KEYFOB = 3
+    CURTAIN = 4
+
+
+MOTION_KINDS = frozenset({DeviceKind.MOTION, DeviceKind.CURTAIN})
 
 
-def setup_platform(hass, config, add_devices, discovery_info=None):
+def classify_device(subtype):
+    """Map a device subtype onto a DeviceKind, or None if unsupported."""
+    if subtype is None:
+        return None
+    if "MOTION" in subtype:
+        return DeviceKind.MOTION
+    if "CONTACT" in subtype:
+        return DeviceKind.CONTACT
+    if "KEYFOB" in subtype:
+        return DeviceKind.KEYFOB
+    if "CURTAIN" in subtype:
+        return DeviceKind.CURTAIN
+    return None
+
+
+async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the Visonic Alarm platform."""
-    hub.update()
+    await hass.async_add_executor_job(hub.update)
 
     keyfobs.clear()
 
-    events = hub.alarm.get_events()
-    timestamp_hour_offset = hub.config.get(CONF_EVENT_HOUR_OFFSET)
+    events = await hass.async_add_executor_job(hub.alarm.get_events)
+
+    # Index the event log by user in one pass. Events are returned newest
+    # first, so the first event seen per user is their latest one.
+    latest_event_by_user = {}
+    for event in events:
+        user = event["appointment"].lower()
+        latest_event_by_user.setdefault(user, event)
 
+    entities = []
     for device in hub.alarm.devices:
-        if device is not None:
-            if device.subtype is not None:
-                if (
-                    "CONTACT" in device.subtype
-                    or "MOTION" in device.subtype
-                    or "CURTAIN" in device.subtype
-                    or "KEYFOB" in device.subtype
-                ):
-                    _msg = f"New device found [Type:{device.subtype}] [ID:{device.id}]"
-                    _LOGGER.debug(_msg)
-                    if "KEYFOB" in device.subtype:
-                        user = f"user {device.device_number}"
-
-                        keyfobs.update(
-                            {
-                                user: [
-                                    device.name,
-                                    device.id
-                                ]
-                            }
-                        )
-
-                    add_devices([VisonicAlarmContact(hub.alarm, device.id)], True)
+        if device is None:
+            continue
+
+        kind = classify_device(device.subtype)
+        if kind is None:
+            continue
+
+        # Rebuild the keyfob record on every setup run, even when the
+        # entity itself already exists, since the dict was just cleared.
+        if kind is DeviceKind.KEYFOB:
+            user = f"user {device.device_number}"
+
+            last_event = latest_event_by_user.get(user)
+            if last_event is not None:
+                last_time_used = last_event.get("datetime")
+                last_operation = last_event.get("label")
+            else:
+                last_time_used = None
+                last_operation = None
+
+            keyfobs[user] = KeyfobInfo(
+                name=device.name,
+                id=device.id,
+                last_time_used=last_time_used,
+                last_operation=last_operation,
+            )
+
+        if device.id in _ADDED_DEVICE_IDS:
+            continue
+        _ADDED_DEVICE_IDS.add(device.id)
+
+        _LOGGER.debug(
+            "New device found [Type:%s] [ID:%s]", device.subtype, device.id
+        )
+        entities.append(VisonicAlarmContact(hub.alarm, device))
+
+    async_add_entities(entities, True)
 
 
 class VisonicAlarmContact(Entity):
     """Implementation of a Visonic Alarm Contact sensor."""
 
-    def __init__(self, alarm, contact_id):
+    _attr_should_poll = False
+
+    def __init__(self, alarm, device):
         """Initialize the sensor."""
         self._state = STATE_UNKNOWN
         self._alarm = alarm
-        self._id = contact_id
+        self._id = device.id
+        self._kind = classify_device(device.subtype)
+        zone = device.zone or ""
+        self._is_24h = "24H" in zone
+        self._is_interior = "INTERIOR" in zone
         self._name = None
         self._zone = None
         self._device_type = None
         self._keyfob_number = None
         self._subtype = None
+        self._last_seen_update = None
+        self._attr_extra_state_attributes = {}
+
+    async def async_added_to_hass(self):
+        """Register for update notifications from the hub."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_VISONIC_UPDATE, self._update_callback
+            )
+        )
+
+    @callback
+    def _update_callback(self):
+        """Refresh the entity state from the hub data."""
+        self.async_schedule_update_ha_state(True)
 
     @property
     def name(self):
@@ -103,112 +193,93 @@ class VisonicAlarmContact(Entity):
         """Return the keyfob number."""
         return self._keyfob_number
 
-    @property
-    def state_attributes(self):
-        """Return the state attributes of the alarm system."""
-        if "KEYFOB" in self._subtype:
-            return {
-                CONTACT_ATTR_ZONE: self._zone,
-                CONTACT_ATTR_NAME: self._name,
-                CONTACT_ATTR_DEVICE_TYPE: self._device_type,
-                CONTACT_ATTR_SUBTYPE: self._subtype,
-                KEYFOB_ATTR_KEYFOB_NUMBER: self._keyfob_number
-            }
-        return {
+    def _refresh_attributes(self):
+        """Rebuild the cached attribute dict if anything changed."""
+        attributes = {
             CONTACT_ATTR_ZONE: self._zone,
             CONTACT_ATTR_NAME: self._name,
             CONTACT_ATTR_DEVICE_TYPE: self._device_type,
             CONTACT_ATTR_SUBTYPE: self._subtype,
         }
+        if self._kind is DeviceKind.KEYFOB:
+            attributes[KEYFOB_ATTR_KEYFOB_NUMBER] = self._keyfob_number
+        if attributes != self._attr_extra_state_attributes:
+            self._attr_extra_state_attributes = attributes
 
     @property
     def icon(self):
         """Return icon."""
-        icon = None
-        if not self._zone and "24H" in self._zone:
-            if self._state == STATE_CLOSED:
-                icon = "mdi:hours-24"
-            else:
-                icon = "mdi:alarm-light"
-        elif "KEYFOB" in self._subtype:
-            icon = "mdi:key-outline"
-        elif self._state == STATE_CLOSED:
-            icon = "mdi:door-closed"
-        elif self._state == STATE_OPEN:
-            icon = "mdi:door-open"
-        elif self._state == STATE_OFF:
-            icon = "mdi:motion-sensor-off"
-        elif self._state == STATE_ON:
-            icon = "mdi:motion-sensor"
-        return icon
+        if self._is_24h:
+            return ICONS_24H.get(self._state, "mdi:alarm-light")
+        if self._kind is DeviceKind.KEYFOB:
+            return "mdi:key-outline"
+        return ICONS.get(self._state)
 
     @property
     def state(self):
         """Return the state of the sensor."""
         return self._state
 
-    def update(self):
-        """Get the latest data."""
-        try:
-            hub.update()
-
-            device = self._alarm.get_device_by_id(self._id)
-
-            status = device.state
-
-            if status is None:
-                _msg = f"Device could not be found: {self._id}"
-                _LOGGER.warning(_msg)
-                return
-
-            if "CURTAIN" in device.subtype or "MOTION" in device.subtype:
-                alarm_state = self._alarm.state
-                alarm_zone = device.zone
-
-                if alarm_state in ("DISARM", "ARMING"):
-                    if "24H" in alarm_zone:
-                        self._state = STATE_ON
-                    else:
-                        self._state = STATE_OFF
-                elif alarm_state == "HOME":
-                    if "INTERIOR" in alarm_zone:
-                        self._state = STATE_OFF
-                    else:
-                        self._state = STATE_ON
-                elif alarm_state in ("AWAY", "DISARMING"):
+    async def async_update(self):
+        """Get the latest data from the hub."""
+        if hub.last_update == self._last_seen_update:
+            return
+        self._last_seen_update = hub.last_update
+
+        device = hub.get_device(self._id)
+
+        if device is None:
+            _LOGGER.warning("Device could not be found: %s", self._id)
+            return
+
+        status = device.state
+
+        if self._kind in MOTION_KINDS:
+            alarm_state = self._alarm.state
+
+            if alarm_state in ALARM_DISARMED_STATES:
+                if self._is_24h:
                     self._state = STATE_ON
                 else:
-                    self._state = STATE_UNKNOWN
-            elif "KEYFOB" in device.subtype:
-                self._state = STATE_CLOSED
-                self._keyfob_number = device.device_number
-            elif "CONTACT" in device.subtype:
-                if status == "opened":
-                    self._state = STATE_OPEN
+                    self._state = STATE_OFF
+            elif alarm_state == "HOME":
+                if self._is_interior:
+                    self._state = STATE_OFF
                 else:
-                    self._state = STATE_CLOSED
+                    self._state = STATE_ON
+            elif alarm_state in ALARM_ARMED_STATES:
+                self._state = STATE_ON
             else:
-                _msg = f"Unrecognized device: {device.subtype}"
-                _LOGGER.debug(_msg)
-                if status == "opened":
-                    self._state = STATE_OPEN
-                elif status == "closed":
-                    self._state = STATE_CLOSED
-                else:
-                    self._state = STATE_UNKNOWN
-
-            # orig_level = _LOGGER.level
-            # _LOGGER.setLevel(logging.DEBUG)
-            # _LOGGER.debug("alarm.state %s", self._alarm.state)
-            # _LOGGER.setLevel(orig_level)
-
-            self._zone = device.zone
-            self._name = device.name
-            self._device_type = device.device_type
-            self._subtype = device.subtype
-
-            _msg = f"Device {device.subtype}: state updated to {self._state}"
-            _LOGGER.debug(_msg)
-        except OSError as error:
-            _msg = f"Could not update the device information: {error}"
-            _LOGGER.warning(_msg)
+                self._state = STATE_UNKNOWN
+        elif self._kind is DeviceKind.KEYFOB:
+            self._state = STATE_CLOSED
+            self._keyfob_number = device.device_number
+        elif self._kind is DeviceKind.CONTACT:
+            if status == "opened":
+                self._state = STATE_OPEN
+            else:
+                self._state = STATE_CLOSED
+        else:
+            _LOGGER.debug("Unrecognized device: %s", device.subtype)
+            if status == "opened":
+                self._state = STATE_OPEN
+            elif status == "closed":
+                self._state = STATE_CLOSED
+            else:
+                self._state = STATE_UNKNOWN
+
+        # orig_level = _LOGGER.level
+        # _LOGGER.setLevel(logging.DEBUG)
+        # _LOGGER.debug("alarm.state %s", self._alarm.state)
+        # _LOGGER.setLevel(orig_level)
+
+        self._zone = device.zone
+        self._name = device.name
+        self._device_type = device.device_type
+        self._subtype = device.subtype
+
+        self._refresh_attributes()
+
+        _LOGGER.debug(
+            "Device %s: state updated to %s", device.subtype, self._state
+        )